@@ -0,0 +1,82 @@
+"""Benchmark the import time of the plugin module.
+
+Runs `python -X importtime` in a fresh interpreter for each repeat, so no
+modules are cached between runs, and reports the cumulative import time
+of the plugin plus the slowest modules it pulls in.
+
+Also reports whether the mail and template machinery, which should only
+load on the first notification, was imported at plugin load.
+
+Note this is a bare import of the plugin module. At app start CKAN also
+calls get_actions and get_blueprint, which import logic.py and views.py
+(and ckan.logic.action.get), so those are not deferred past startup.
+
+Usage:
+    python benchmarks/import_time.py [--repeat 5] [--top 15]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+PLUGIN_MODULE = "ckanext.restricted_api.plugin"
+LAZY_MODULES = (
+    "ckan.lib.mailer",
+    "ckan.lib.base",
+    "ckanext.restricted_api.mailer",
+)
+
+
+def _run_importtime():
+    """Import the plugin in a fresh interpreter and parse -X importtime output.
+
+    Returns:
+        dict: module name: cumulative import time in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {PLUGIN_MODULE}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        timings[module.strip()] = int(cumulative)
+    return timings
+
+
+def main():
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [_run_importtime() for _ in range(args.repeat)]
+
+    totals = [run.get(PLUGIN_MODULE, 0) / 1000 for run in runs]
+    print(f"{PLUGIN_MODULE} ({args.repeat} runs)")
+    print(f"  median: {statistics.median(totals):.1f} ms")
+    print(f"  min:    {min(totals):.1f} ms")
+    print(f"  max:    {max(totals):.1f} ms")
+
+    print(f"\nTop {args.top} modules by median cumulative time:")
+    medians = {
+        module: statistics.median(run.get(module, 0) for run in runs) / 1000
+        for module in runs[0]
+    }
+    for module, ms in sorted(medians.items(), key=lambda x: -x[1])[: args.top]:
+        print(f"  {ms:10.1f} ms  {module}")
+
+    print("\nMail and template modules, deferred until the first notification:")
+    for module in LAZY_MODULES:
+        status = "imported at load" if module in runs[0] else "deferred"
+        print(f"  {module}: {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""Load test the plugin against a local CKAN test instance.
+
+Resets the database and search index configured in the CKAN ini (by
+default test.ini) and seeds them with synthetic organisations, users and
+restricted datasets, then drives a
+concurrent mixed workload through the Flask test client and reports
+throughput, p50/p95/p99 latency and DB queries per request.
+
+No network access is needed beyond the local database and Solr used by
+the CKAN test config. Access granted emails are not sent unless
+--send-mail is passed.
+
+Queries are counted per request thread, so queries run by
+search_workers threads are not included.
+
+Requires the CKAN dev requirements (for ckan.tests.factories).
+
+As this wipes the configured database and Solr core, it refuses to run
+unless --reset-db is passed. Only use it with a test config.
+
+Usage:
+    python benchmarks/load_test.py -c test.ini --reset-db --concurrency 1,4,8
+"""
+
+import argparse
+import json
+import math
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from ckan import model
+from ckan.cli import load_config
+from ckan.config.middleware import make_app
+from ckan.tests import factories, helpers
+from sqlalchemy import event
+
+RESTRICTED_LEVELS = (
+    "public",
+    "registered",
+    "only_allowed_users",
+    "any_organization",
+    "same_organization",
+)
+DEFAULT_MIX = "anon_search=4,member_search=4,check_access=3,grant=1"
+
+_query_count = threading.local()
+
+
+def _count_query(*args, **kwargs):
+    """Count queries issued by the current thread."""
+    _query_count.value = getattr(_query_count, "value", 0) + 1
+
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def seed(flask_app, n_orgs, n_users, n_datasets, n_resources, rng):
+    """Create synthetic orgs, users and datasets with restricted resources.
+
+    Returns:
+        dict: users (name, token, org), datasets (id, resource ids) and org admins.
+    """
+    with flask_app.test_request_context():
+        users = []
+        for i in range(n_users):
+            user = factories.User(name=f"loadtest_user_{i}")
+            token = factories.APIToken(user=user["name"])["token"]
+            users.append({"name": user["name"], "token": token})
+            # Every other user is a member of an org, the rest have none
+            if i % 2 == 0:
+                users[-1]["org"] = (i // 2) % n_orgs
+
+        orgs = []
+        for i in range(n_orgs):
+            admin = factories.User(name=f"loadtest_admin_{i}")
+            admin_token = factories.APIToken(user=admin["name"])["token"]
+            members = [
+                {"name": user["name"], "capacity": "member"}
+                for user in users
+                if user.get("org") == i
+            ]
+            org = factories.Organization(
+                name=f"loadtest_org_{i}",
+                users=[{"name": admin["name"], "capacity": "admin"}] + members,
+            )
+            orgs.append({"id": org["id"], "admin_token": admin_token})
+
+        datasets = []
+        for i in range(n_datasets):
+            org_index = i % n_orgs
+            resources = []
+            for j in range(n_resources):
+                allowed_users = rng.sample(users, k=min(2, len(users)))
+                resources.append(
+                    {
+                        "url": f"http://example.com/{i}/{j}.csv",
+                        "name": f"resource {j}",
+                        "restricted": json.dumps(
+                            {
+                                "level": rng.choice(RESTRICTED_LEVELS),
+                                "allowed_users": ",".join(
+                                    user["name"] for user in allowed_users
+                                ),
+                            }
+                        ),
+                    }
+                )
+            dataset = factories.Dataset(
+                name=f"loadtest_dataset_{i}",
+                owner_org=orgs[org_index]["id"],
+                resources=resources,
+            )
+            datasets.append(
+                {
+                    "id": dataset["id"],
+                    "org": org_index,
+                    "resources": [r["id"] for r in dataset["resources"]],
+                }
+            )
+
+    return {"users": users, "orgs": orgs, "datasets": datasets}
+
+
+def _workloads(data, rng):
+    """Request builders for each workload, returning (method, url, kwargs)."""
+    members = [user for user in data["users"] if "org" in user] or data["users"]
+
+    def _auth(token):
+        return {"headers": {"Authorization": token}}
+
+    def anon_search():
+        return "get", "/api/3/action/package_search?rows=100", {}
+
+    def member_search():
+        user = rng.choice(members)
+        return "get", "/api/3/action/package_search?rows=100", _auth(user["token"])
+
+    def check_access():
+        user = rng.choice(data["users"])
+        dataset = rng.choice(data["datasets"])
+        url = (
+            "/api/3/action/restricted_check_access"
+            f"?package_id={dataset['id']}"
+            f"&resource_id={rng.choice(dataset['resources'])}"
+        )
+        return "get", url, _auth(user["token"])
+
+    def grant():
+        dataset = rng.choice(data["datasets"])
+        admin_token = data["orgs"][dataset["org"]]["admin_token"]
+        allowed_users = rng.sample(data["users"], k=min(3, len(data["users"])))
+        restricted = {
+            "level": "only_allowed_users",
+            "allowed_users": ",".join(user["name"] for user in allowed_users),
+        }
+        return (
+            "post",
+            "/api/3/action/resource_patch",
+            dict(
+                _auth(admin_token),
+                json={
+                    "id": rng.choice(dataset["resources"]),
+                    "restricted": json.dumps(restricted),
+                },
+            ),
+        )
+
+    return {
+        "anon_search": anon_search,
+        "member_search": member_search,
+        "check_access": check_access,
+        "grant": grant,
+    }
+
+
+def run(flask_app, data, mix, concurrency, n_requests, seed_value):
+    """Run the mixed workload with a number of concurrent clients.
+
+    Returns:
+        dict: workload name: list of (latency_ms, queries, ok) tuples,
+            plus the wall clock duration.
+    """
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = defaultdict(list)
+    samples_lock = threading.Lock()
+    remaining = iter(range(n_requests))
+    remaining_lock = threading.Lock()
+
+    def _client_loop(client_index):
+        rng = random.Random(seed_value + client_index)
+        workloads = _workloads(data, rng)
+        client = flask_app.test_client()
+        while True:
+            with remaining_lock:
+                if next(remaining, None) is None:
+                    return
+            name = rng.choices(names, weights)[0]
+            method, url, kwargs = workloads[name]()
+
+            _query_count.value = 0
+            start = time.perf_counter()
+            response = getattr(client, method)(url, **kwargs)
+            latency_ms = (time.perf_counter() - start) * 1000
+            queries = _query_count.value
+            # Release this thread's session, as the request teardown would
+            model.Session.remove()
+
+            with samples_lock:
+                samples[name].append((latency_ms, queries, response.status_code < 400))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(_client_loop, range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+def summarise(samples, duration):
+    """Summarise latency, throughput and queries per workload."""
+    summary = {}
+    all_samples = [s for workload in samples.values() for s in workload]
+    for name, workload in list(samples.items()) + [("total", all_samples)]:
+        latencies = [s[0] for s in workload]
+        summary[name] = {
+            "requests": len(workload),
+            "errors": sum(1 for s in workload if not s[2]),
+            "throughput_rps": round(len(workload) / duration, 1) if duration else 0,
+            "p50_ms": round(_percentile(latencies, 50), 1),
+            "p95_ms": round(_percentile(latencies, 95), 1),
+            "p99_ms": round(_percentile(latencies, 99), 1),
+            "queries_per_request": round(
+                statistics.mean(s[1] for s in workload), 1
+            )
+            if workload
+            else 0,
+        }
+    return summary
+
+
+def _print_summary(concurrency, summary):
+    """Print a summary table for one concurrency level."""
+    print(f"\nconcurrency={concurrency}")
+    print(
+        f"  {'workload':<15}{'reqs':>7}{'errors':>8}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+    )
+    for name, row in summary.items():
+        print(
+            f"  {name:<15}{row['requests']:>7}{row['errors']:>8}"
+            f"{row['throughput_rps']:>9}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+            f"{row['p99_ms']:>9}{row['queries_per_request']:>9}"
+        )
+
+
+def main():
+    """Seed the test instance, run each concurrency level and report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-c", "--config", default="test.ini")
+    parser.add_argument(
+        "--reset-db",
+        action="store_true",
+        help="Confirm the database and search index of the config can be wiped.",
+    )
+    parser.add_argument("--orgs", type=int, default=5)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--datasets", type=int, default=200)
+    parser.add_argument("--resources", type=int, default=3)
+    parser.add_argument(
+        "--concurrency",
+        default="1,4,8",
+        help="Comma separated concurrency levels to run.",
+    )
+    parser.add_argument("--requests", type=int, default=500, help="Per level.")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="name=weight,...")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="Also write results here.")
+    parser.add_argument(
+        "--send-mail",
+        action="store_true",
+        help="Send access granted emails on grants, needs a working SMTP server.",
+    )
+    args = parser.parse_args()
+
+    if not args.reset_db:
+        parser.error(
+            f"this wipes the database and search index configured in {args.config}, "
+            "pass --reset-db to confirm it is a test instance"
+        )
+
+    mix = {
+        name: float(weight)
+        for name, weight in (item.split("=") for item in args.mix.split(","))
+    }
+    rng = random.Random(args.seed)
+
+    app = make_app(load_config(args.config))
+    flask_app = app._wsgi_app
+
+    if not args.send_mail:
+        from ckan.lib import mailer
+
+        mailer.mail_user = lambda *mail_args, **mail_kwargs: None
+
+    print("Resetting database and search index...")
+    helpers.reset_db()
+    from ckan.lib.search import clear_all
+
+    clear_all()
+
+    print(
+        f"Seeding {args.orgs} orgs, {args.users} users, "
+        f"{args.datasets} datasets x {args.resources} resources..."
+    )
+    data = seed(flask_app, args.orgs, args.users, args.datasets, args.resources, rng)
+
+    event.listen(model.meta.engine, "before_cursor_execute", _count_query)
+
+    results = {}
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        samples, duration = run(
+            flask_app, data, mix, concurrency, args.requests, args.seed
+        )
+        results[concurrency] = summarise(samples, duration)
+        _print_summary(concurrency, results[concurrency])
+
+    if args.json_path:
+        with open(args.json_path, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
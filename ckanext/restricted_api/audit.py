@@ -0,0 +1,231 @@
+"""Buffered, sampled audit stream for resource access denials.
+
+Denials are appended to a bounded in-memory ring buffer and written in
+batches by a background thread, instead of logging inside the
+per-resource loops. Within a request, denials are also counted per user
+and emitted as a single summary record when the request ends.
+
+When auditing is disabled `recorder` is None, and callers only pay for
+a single attribute check.
+"""
+
+import atexit
+import json
+import os
+import random
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from logging import getLogger
+from threading import Event, Lock, Thread
+
+from flask import Flask, request
+
+log = getLogger(__name__)
+
+audit_log = getLogger("ckanext.restricted_api.audit")
+
+# The active recorder, None when auditing is disabled
+recorder = None
+_atexit_registered = False
+
+# Denial counts for the current request, passed explicitly to executor workers
+_request_denials: ContextVar = ContextVar("restricted_api_denials", default=None)
+
+
+class RequestDenials:
+    """Thread-safe denial counter for a single request."""
+
+    def __init__(self):
+        """Init empty counters."""
+        self._lock = Lock()
+        self.counts = {}
+
+    def add(self, user_name, level):
+        """Count a denial."""
+        with self._lock:
+            self.counts.setdefault(user_name or "", Counter())[level] += 1
+
+
+class AuditRecorder:
+    """Ring buffer of audit records, flushed in batches by a daemon thread."""
+
+    def __init__(
+        self,
+        buffer_size: int,
+        batch_size: int,
+        flush_interval: float,
+        sample_rate: float,
+        audit_file: str = "",
+    ):
+        """Init the buffer, the flush thread is started on first record.
+
+        Records are appended to audit_file if set, otherwise they are
+        logged to the ckanext.restricted_api.audit logger at info level.
+        """
+        self.batch_size = batch_size
+        self.audit_file = audit_file
+        self.flush_interval = flush_interval
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._lock = Lock()
+        self._wake = Event()
+        self._stop = Event()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        """Start the flush thread, again after a fork if needed."""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = Thread(
+                target=self._run, name="restricted_api-audit", daemon=True
+            )
+            self._thread.start()
+
+    def record(self, event: dict):
+        """Append a record to the buffer, dropping the oldest if full."""
+        self._ensure_thread()
+        event.setdefault("time", time.time())
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(event)
+            full_batch = len(self._buffer) >= self.batch_size
+        if full_batch:
+            self._wake.set()
+
+    def record_denial(self, user_name, resource_dict, package_dict, level, msg):
+        """Count a denial for the request and record it, if sampled."""
+        denials = _request_denials.get()
+        if denials is not None:
+            denials.add(user_name, level)
+
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self.record(
+            {
+                "event": "resource_denied",
+                "user": user_name or "",
+                "resource_id": resource_dict.get("id"),
+                "package_id": package_dict.get("id"),
+                "level": level,
+                "reason": msg,
+            }
+        )
+
+    def flush(self):
+        """Write out all buffered records, one batch at a time."""
+        while True:
+            with self._lock:
+                batch = [
+                    self._buffer.popleft()
+                    for _ in range(min(self.batch_size, len(self._buffer)))
+                ]
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                batch.append({"event": "audit_dropped", "count": dropped})
+            if not batch:
+                return
+            self._write("\n".join(json.dumps(event) for event in batch))
+
+    def _write(self, payload: str):
+        """Write one batch as a single write or log record."""
+        if self.audit_file:
+            with open(self.audit_file, "a") as audit_stream:
+                audit_stream.write(payload + "\n")
+        else:
+            audit_log.info(payload)
+
+    def _run(self):
+        """Flush when a batch is full or the interval elapses, until stopped."""
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Failed to flush audit records")
+
+    def stop(self):
+        """Stop the flush thread and write out any remaining records."""
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid():
+            thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+
+def _stop_at_exit():
+    """Flush the active recorder when the process exits."""
+    if recorder is not None:
+        recorder.stop()
+
+
+def configure_audit(settings):
+    """Create the recorder from plugin settings, or disable auditing."""
+    global recorder, _atexit_registered
+
+    # update_config runs again on every environment reload
+    if recorder is not None:
+        recorder.stop()
+        recorder = None
+
+    if not settings.audit_enabled:
+        return
+
+    recorder = AuditRecorder(
+        buffer_size=settings.audit_buffer_size,
+        batch_size=settings.audit_batch_size,
+        flush_interval=settings.audit_flush_interval,
+        sample_rate=settings.audit_sample_rate,
+        audit_file=settings.audit_file,
+    )
+    if not _atexit_registered:
+        atexit.register(_stop_at_exit)
+        _atexit_registered = True
+
+
+def _audit_before_request():
+    """Start counting denials for this request."""
+    if recorder is not None:
+        _request_denials.set(RequestDenials())
+
+
+def _audit_teardown_request(exception=None):
+    """Record one summary of the denials in this request."""
+    denials = _request_denials.get()
+    if denials is None:
+        return
+    _request_denials.set(None)
+    if recorder is None:
+        return
+    for user_name, by_level in denials.counts.items():
+        recorder.record(
+            {
+                "event": "request_summary",
+                "user": user_name,
+                "path": request.path,
+                "denied": sum(by_level.values()),
+                "by_level": dict(by_level),
+            }
+        )
+
+
+def add_audit_handlers(app):
+    """Register per-request denial aggregation on the CKAN Flask app."""
+    if recorder is None:
+        return app
+    if not isinstance(app, Flask):
+        log.warning("App is not a Flask app, per-request audit summary disabled")
+        return app
+
+    app.before_request(_audit_before_request)
+    app.teardown_request(_audit_teardown_request)
+    return app
@@ -5,6 +5,7 @@ from logging import getLogger
 import ckan.logic.auth as logic_auth
 import ckan.plugins.toolkit as toolkit
 
+from ckanext.restricted_api import audit
 from ckanext.restricted_api.util import (
     get_restricted_dict,
     get_user_organisations,
@@ -34,11 +35,37 @@ def restricted_resource_show(context, data_dict=None):
         package = model.Package.get(resource.get("package_id"))
         package = package.as_dict()
 
-    return _restricted_check_user_resource_access(user_name, resource, package)
+    return _restricted_check_user_resource_access(
+        user_name,
+        resource,
+        package,
+        user_organization_dict=context.get("__restricted_user_orgs"),
+    )
+
+
+def _restricted_check_user_resource_access(
+    user_name, resource_dict, package_dict, user_organization_dict=None
+):
+    """Check resource access using restricted info dict.
+
+    If user_organization_dict is passed (e.g. a snapshot taken once per
+    search page), it is used instead of looking up the organisations again.
+    """
+    result, restricted_level = _evaluate_user_resource_access(
+        user_name, resource_dict, package_dict, user_organization_dict
+    )
+    # Denials go to the audit stream rather than the log, as this runs per resource
+    if not result["success"] and audit.recorder is not None:
+        audit.recorder.record_denial(
+            user_name, resource_dict, package_dict, restricted_level, result["msg"]
+        )
+    return result
 
 
-def _restricted_check_user_resource_access(user_name, resource_dict, package_dict):
-    """Check resource access using restricted info dict."""
+def _evaluate_user_resource_access(
+    user_name, resource_dict, package_dict, user_organization_dict
+):
+    """Evaluate access, returning the result and the restriction level."""
     restricted_dict = get_restricted_dict(resource_dict)
 
     restricted_level = restricted_dict.get("level", "public")
@@ -46,51 +73,44 @@ def _restricted_check_user_resource_access(user_name, resource_dict, package_dic
 
     # Public resources (DEFAULT)
     if not restricted_level or restricted_level == "public":
-        return {"success": True}
+        return {"success": True}, restricted_level
 
     # Registered users only
     if not user_name:
-        log.warning(
-            "Unauthenticated user attempted to access restricted resource ID: "
-            f"{resource_dict.get('id')}"
-        )
         return {
             "success": False,
             "msg": "Resource access restricted to registered users",
-        }
+        }, restricted_level
     if restricted_level == "registered":
-        return {"success": True}
+        return {"success": True}, restricted_level
 
     # Since we have a user, check if it is in the allowed list
     if user_name in allowed_users:
-        return {"success": True}
+        return {"success": True}, restricted_level
     elif restricted_level == "only_allowed_users":
-        log.debug(
-            f"{user_name} attempted and failed to access restricted "
-            f"resource ID: {resource_dict.get('id')}"
-        )
         return {
             "success": False,
             "msg": "Resource access restricted to allowed users only",
-        }
+        }, restricted_level
 
     # Get organization list
-    user_organization_dict = get_user_organisations(user_name)
+    if user_organization_dict is None:
+        user_organization_dict = get_user_organisations(user_name)
 
     # Any Organization Members (Trusted Users)
     if not user_organization_dict:
         return {
             "success": False,
             "msg": "Resource access restricted to members of an organization",
-        }
+        }, restricted_level
     if restricted_level == "any_organization":
-        return {"success": True}
+        return {"success": True}, restricted_level
 
     # Same Organization Members
     pkg_organization_id = package_dict.get("owner_org", "")
     if restricted_level == "same_organization":
         if pkg_organization_id in user_organization_dict.keys():
-            return {"success": True}
+            return {"success": True}, restricted_level
 
     return {
         "success": False,
@@ -98,4 +118,4 @@ def _restricted_check_user_resource_access(user_name, resource_dict, package_dic
             "Resource access restricted to same "
             f"organization ({pkg_organization_id}) members"
         ),
-    }
+    }, restricted_level
@@ -0,0 +1,71 @@
+"""CLI commands for the plugin."""
+
+import io
+import json
+import os
+import pstats
+
+import click
+
+from ckanext.restricted_api.profiler import list_profiles
+from ckanext.restricted_api.settings import get_settings
+
+
+@click.group(name="restricted-api")
+def restricted_api():
+    """Restricted API plugin commands."""
+
+
+@restricted_api.command(name="profile-summary")
+@click.option("--dir", "directory", help="Profile directory, default from config.")
+@click.option("--action", "action_name", help="Only include this action.")
+@click.option("--top", default=25, show_default=True, help="Functions to show.")
+@click.option(
+    "--sort",
+    default="cumulative",
+    show_default=True,
+    type=click.Choice(["cumulative", "tottime", "ncalls"]),
+)
+def profile_summary(directory, action_name, top, sort):
+    """Summarize the top functions across sampled action profiles."""
+    directory = directory or get_settings().profile_dir
+    if not directory:
+        raise click.UsageError(
+            "Pass --dir, or set ckanext.restricted_api.profile_dir "
+            "or ckan.storage_path"
+        )
+    profiles = sorted(list_profiles(directory, action_name))
+    if not profiles:
+        click.echo(f"No profiles found in {directory}")
+        return
+
+    durations = []
+    for pstats_path in profiles:
+        metadata_path = pstats_path[: -len(".pstats")] + ".json"
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as metadata_file:
+                metadata = json.load(metadata_file)
+            durations.append(
+                (metadata.get("duration_ms", 0), metadata.get("action"), metadata)
+            )
+
+    click.echo(f"{len(profiles)} samples from {directory}")
+    if durations:
+        click.echo("\nSlowest samples:")
+        for duration_ms, sampled_action, metadata in sorted(
+            durations, key=lambda x: -x[0]
+        )[:5]:
+            click.echo(
+                f"  {duration_ms:10.1f} ms  {sampled_action}  "
+                f"user={metadata.get('user')}  params={metadata.get('params')}"
+            )
+
+    output = io.StringIO()
+    stats = pstats.Stats(*profiles, stream=output)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    click.echo(output.getvalue())
+
+
+def get_commands():
+    """Commands to register with the CKAN CLI."""
+    return [restricted_api]
@@ -0,0 +1,137 @@
+"""Bounded thread pool for redacting large package_search pages."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from logging import getLogger
+from threading import Lock
+from types import MappingProxyType
+
+from ckan import model
+from flask import current_app, has_app_context
+
+from ckanext.restricted_api import audit
+from ckanext.restricted_api.util import (
+    get_user_organisations,
+    get_username_from_context,
+)
+
+log = getLogger(__name__)
+
+# Context keys bound to the calling thread (its session, or mutable state
+# CKAN pushes and pops during actions), never shared with workers
+_THREAD_UNSAFE_KEYS = (
+    "auth_user_obj",
+    "__auth_user_obj_checked",
+    "__auth_audit",
+    "session",
+    "package",
+    "resource",
+)
+
+_executor = None
+_executor_workers = 0
+_executor_lock = Lock()
+
+
+def _get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Get the shared executor, rebuilt if search_workers has changed.
+
+    The size can change when update_config runs again on a config reload.
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != max_workers:
+            if _executor is not None:
+                # Running tasks finish, new ones go to the resized pool
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="restricted_api",
+            )
+            _executor_workers = max_workers
+    return _executor
+
+
+def get_identity_snapshot(context) -> MappingProxyType:
+    """Build a read-only copy of the caller's identity and organisations.
+
+    The organisations are resolved once here, so workers do not repeat
+    the lookup for every restricted resource they evaluate.
+    """
+    user_name = get_username_from_context(context)
+    user_organization_dict = get_user_organisations(user_name) if user_name else {}
+
+    snapshot = {
+        key: value
+        for key, value in context.items()
+        if key not in _THREAD_UNSAFE_KEYS
+    }
+    snapshot["user"] = user_name or ""
+    snapshot["__restricted_user_orgs"] = MappingProxyType(user_organization_dict)
+    return MappingProxyType(snapshot)
+
+
+def _redact_chunk(
+    app, snapshot, denials, package_show_func, chunk_index, package_ids
+):
+    """Redact one chunk of packages inside its own scoped session.
+
+    Only the caller's audit denial counter is shared with the worker, not
+    its other context variables (e.g. the Flask request context).
+    """
+    start = time.perf_counter()
+    results = []
+    denials_token = audit._request_denials.set(denials)
+    try:
+        with app.app_context() if app else nullcontext():
+            for package_id in package_ids:
+                context = dict(snapshot)
+                context["session"] = model.Session
+                results.append(package_show_func(context, {"id": package_id}))
+    finally:
+        # Scoped sessions are thread-local, release this worker's connection
+        model.Session.remove()
+        audit._request_denials.reset(denials_token)
+
+    duration_ms = (time.perf_counter() - start) * 1000
+    log.debug(
+        "Redacted chunk %s (%s packages) in %.1f ms",
+        chunk_index,
+        len(package_ids),
+        duration_ms,
+    )
+    return results, duration_ms
+
+
+def redact_packages_parallel(
+    context, package_ids, package_show_func, max_workers: int, chunk_size: int
+) -> tuple:
+    """Redact packages in chunks on a bounded pool, preserving order.
+
+    Returns:
+        tuple: the redacted packages, and the latency of each chunk in ms.
+    """
+    snapshot = get_identity_snapshot(context)
+    app = current_app._get_current_object() if has_app_context() else None
+    denials = audit._request_denials.get()
+
+    chunks = [
+        package_ids[i : i + chunk_size]
+        for i in range(0, len(package_ids), chunk_size)
+    ]
+    executor = _get_executor(max_workers)
+    futures = [
+        executor.submit(
+            _redact_chunk, app, snapshot, denials, package_show_func, index, chunk
+        )
+        for index, chunk in enumerate(chunks)
+    ]
+
+    results = []
+    chunk_timings_ms = []
+    for future in futures:
+        chunk_results, duration_ms = future.result()
+        results.extend(chunk_results)
+        chunk_timings_ms.append(round(duration_ms, 1))
+    return results, chunk_timings_ms
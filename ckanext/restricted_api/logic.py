@@ -19,7 +19,8 @@ from ckan.logic.action.get import (
 from ckan.plugins import toolkit
 
 from ckanext.restricted_api.auth import restricted_resource_show
-from ckanext.restricted_api.mailer import send_access_request_email
+from ckanext.restricted_api.executor import redact_packages_parallel
+from ckanext.restricted_api.settings import get_settings
 from ckanext.restricted_api.util import (
     check_user_resource_access,
     get_user_id_from_context,
@@ -51,11 +52,7 @@ def restricted_current_package_list(context, data_dict):
     """Add restriction to current_package_list_with_resources."""
     current_packages = current_package_list_with_resources(context, data_dict)
 
-    omit_resources = bool(
-        toolkit.config.get("ckanext.restricted_api.omit_resources_on_pkg_list", True)
-    )
-
-    if omit_resources:
+    if get_settings().omit_resources_on_pkg_list:
         # Remove 'resources' array from each package
         for package in current_packages:
             package["resources"] = ["redacted"]
@@ -78,6 +75,11 @@ def restricted_package_show(context, data_dict):
         # Skip dataset (user has no access to view)
         return {}
 
+    return redact_package_dict(context, package_metadata)
+
+
+def redact_package_dict(context, package_metadata):
+    """Redact restricted resources of a package, unless the user can edit it."""
     # Ensure user who can edit can see the resource
     try:
         if toolkit.check_access("package_update", context, package_metadata):
@@ -128,15 +130,34 @@ def restricted_package_search(context, data_dict):
     package_show_context = context.copy()
     package_show_context["with_capacity"] = False
 
+    settings = get_settings()
+
     for key, value in package_search_result.items():
         if key == "results":
-            restricted_package_search_result_list = []
-            for package in value:
-                restricted_package_search_result_list.append(
-                    restricted_package_show(
-                        package_show_context, {"id": package.get("id")}
-                    )
+            package_ids = [package.get("id") for package in value]
+            if (
+                settings.search_workers > 0
+                and len(package_ids) >= settings.search_parallel_min_rows
+            ):
+                (
+                    restricted_package_search_result_list,
+                    chunk_timings_ms,
+                ) = redact_packages_parallel(
+                    package_show_context,
+                    package_ids,
+                    restricted_package_show,
+                    max_workers=settings.search_workers,
+                    chunk_size=settings.search_chunk_size,
                 )
+                if settings.search_report_timings:
+                    restricted_package_search_result[
+                        "restricted_chunk_timings_ms"
+                    ] = chunk_timings_ms
+            else:
+                restricted_package_search_result_list = [
+                    restricted_package_show(package_show_context, {"id": package_id})
+                    for package_id in package_ids
+                ]
             restricted_package_search_result[
                 key
             ] = restricted_package_search_result_list
@@ -197,6 +218,9 @@ def restricted_request_access(
     data_dict,  #: DataDict,
 ):
     """Send access request email to resource admin/maintainer."""
+    # Imported on first use, to keep mail and template machinery out of startup
+    from ckanext.restricted_api.mailer import send_access_request_email
+
     log.debug(f"start function restricted_request_access, params: {data_dict}")
 
     # Check if parameters are present
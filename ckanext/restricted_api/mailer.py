@@ -4,15 +4,28 @@ import json
 from logging import getLogger
 
 from ckan.common import config
-from ckan.lib import mailer
-from ckan.lib.base import render
 from ckan.plugins import toolkit
 
+from ckanext.restricted_api.settings import get_settings
 from ckanext.restricted_api.util import get_user_from_email
 
 log = getLogger(__name__)
 
 
+def _get_mailer():
+    """Import the CKAN mailer on first use, it is slow to import."""
+    from ckan.lib import mailer
+
+    return mailer
+
+
+def _render(template_name, extra_vars):
+    """Render a template, importing the template machinery on first use."""
+    from ckan.lib.base import render
+
+    return render(template_name, extra_vars)
+
+
 def restricted_notify_access_granted(previous_value, updated_resource):
     """Notify new allowed users to a restricted dataset."""
 
@@ -62,6 +75,7 @@ def send_access_granted_email(user_id, resource):
     body = _get_access_granted_mail_body(user.as_dict(), resource_name)
     subject = f"Access granted to resource: {resource_name}"
     log.debug(f"Sending resource access email to user: {str(user.email)}")
+    mailer = _get_mailer()
     mailer.mail_user(user, subject, body)
 
 
@@ -82,11 +96,7 @@ def _get_access_granted_mail_body(user: dict, resource_id):
         "resource_name": resource_id,
     }
     # NOTE: This template is translated
-    access_granted_template = config.get(
-        "restricted_api.access_granted_template",
-        "access_granted.txt",
-    )
-    return render(access_granted_template, extra_vars)
+    return _render(get_settings().access_granted_template, extra_vars)
 
 
 def send_access_request_email(
@@ -118,6 +128,7 @@ def send_access_request_email(
     )
     subject = f"Access request for resource: {resource_id}"
     log.debug(f"Sending resource access email to user: {str(resource_admin_obj.email)}")
+    mailer = _get_mailer()
     mailer.mail_user(resource_admin_obj, subject, body)
 
 
@@ -141,8 +152,4 @@ def _get_access_request_mail_body(
         "request_user_id": request_user_id,
     }
     # NOTE: This template is translated
-    access_request_template = config.get(
-        "restricted_api.access_request_template",
-        "access_request.txt",
-    )
-    return render(access_request_template, extra_vars)
+    return _render(get_settings().access_request_template, extra_vars)
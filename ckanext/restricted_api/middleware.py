@@ -0,0 +1,107 @@
+"""Conditional GET (ETag) support for redacted API actions."""
+
+import hashlib
+import re
+from logging import getLogger
+from urllib.parse import urlencode
+
+from ckan import model
+from ckan.plugins import toolkit
+from flask import Flask, Response, g, request
+
+from ckanext.restricted_api.settings import get_settings
+from ckanext.restricted_api.util import get_user_access_fingerprint
+
+log = getLogger(__name__)
+
+_ETAG_ACTION_PATH = re.compile(
+    r"^/api/(?:\d+/)?action/(package_show|restricted_check_access)/?$"
+)
+
+
+def _get_action_package_id(action_name):
+    """Get the package id or name the action was called for."""
+    if action_name == "package_show":
+        return request.args.get("id") or request.args.get("name_or_id")
+    return request.args.get("package_id")
+
+
+def compute_etag(action_name):
+    """Compute the ETag for a conditional action request.
+
+    Combines the package metadata_modified with a fingerprint of the
+    caller's access-relevant identity, so no per-resource evaluation
+    is needed to decide if the response changed. All query params are
+    included, as some (e.g. use_default_schema) change the response body.
+
+    Returns:
+        str: the ETag, or None if the package cannot be found, or for
+            restricted_check_access if the resource is not in the package.
+    """
+    package_id = _get_action_package_id(action_name)
+    if not package_id:
+        return None
+    package = model.Package.get(package_id)
+    if not package or not package.metadata_modified:
+        return None
+
+    if action_name == "restricted_check_access":
+        # Only the resource's own package metadata_modified tracks its changes
+        resource = model.Resource.get(request.args.get("resource_id", ""))
+        if not resource or resource.package_id != package.id:
+            return None
+
+    user_name = toolkit.current_user.name
+    parts = [
+        action_name,
+        package.id,
+        package.metadata_modified.isoformat(),
+        get_user_access_fingerprint(user_name, package_id=package.id),
+        urlencode(sorted(request.args.items(multi=True))),
+    ]
+
+    return hashlib.sha1(":".join(parts).encode("utf-8")).hexdigest()
+
+
+def _etag_before_request():
+    """Answer If-None-Match with 304 before running the action."""
+    if request.method not in ("GET", "HEAD"):
+        return None
+    match = _ETAG_ACTION_PATH.match(request.path)
+    if not match:
+        return None
+
+    etag = compute_etag(match.group(1))
+    if not etag:
+        return None
+    g.restricted_api_etag = etag
+
+    if request.if_none_match.contains(etag):
+        log.debug(f"ETag match for {request.path}, returning 304")
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+    return None
+
+
+def _etag_after_request(response):
+    """Attach the ETag computed for this request to a successful response."""
+    etag = g.pop("restricted_api_etag", None)
+    if etag and response.status_code == 200:
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def add_etag_handlers(app):
+    """Register the conditional GET handlers on the CKAN Flask app."""
+    if not get_settings().enable_etags:
+        return app
+    if not isinstance(app, Flask):
+        log.warning("App is not a Flask app, conditional GET support disabled")
+        return app
+
+    app.before_request(_etag_before_request)
+    app.after_request(_etag_after_request)
+    return app
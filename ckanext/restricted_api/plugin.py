@@ -4,17 +4,8 @@ from logging import getLogger
 
 from ckan.plugins import SingletonPlugin, implements, interfaces, toolkit
 
-from ckanext.restricted_api.auth import restricted_resource_show
-from ckanext.restricted_api.logic import (
-    restricted_check_access,
-    restricted_current_package_list,
-    restricted_package_search,
-    restricted_package_show,
-    restricted_request_access,
-    restricted_resource_search,
-    restricted_resource_view_list,
-)
-from ckanext.restricted_api.mailer import restricted_notify_access_granted
+from ckanext.restricted_api.audit import configure_audit
+from ckanext.restricted_api.settings import get_settings, load_settings
 
 log = getLogger(__name__)
 
@@ -29,16 +20,32 @@ class RestrictedAPIPlugin(SingletonPlugin):
     implements(interfaces.IActions)
     implements(interfaces.IAuthFunctions)
     implements(interfaces.IResourceController, inherit=True)
+    implements(interfaces.IBlueprint)
+    implements(interfaces.IMiddleware, inherit=True)
+    implements(interfaces.IClick)
 
     # IConfigurer
     def update_config(self, config):
         """Update CKAN with plugin specific config."""
         toolkit.add_template_directory(config, "templates")
+        settings = load_settings(config)
+        configure_audit(settings)
 
     # IActions
     def get_actions(self):
         """Actions to be accessible via the API."""
-        return {
+        from ckanext.restricted_api.logic import (
+            restricted_check_access,
+            restricted_current_package_list,
+            restricted_package_search,
+            restricted_package_show,
+            restricted_request_access,
+            restricted_resource_search,
+            restricted_resource_view_list,
+        )
+        from ckanext.restricted_api.profiler import get_profiler
+
+        actions = {
             "resource_view_list": restricted_resource_view_list,
             "package_show": restricted_package_show,
             "current_package_list_with_resources": restricted_current_package_list,
@@ -48,13 +55,44 @@ class RestrictedAPIPlugin(SingletonPlugin):
             "restricted_request_access": restricted_request_access,
         }
 
+        profiler = get_profiler(get_settings())
+        if profiler:
+            actions = {
+                name: profiler.wrap(name, action) for name, action in actions.items()
+            }
+        return actions
+
     # IAuthFunctions
     def get_auth_functions(self):
         """Overrides for default auth checks."""
+        from ckanext.restricted_api.auth import restricted_resource_show
+
         return {
             "resource_show": restricted_resource_show,
         }
 
+    # IBlueprint
+    def get_blueprint(self):
+        """Blueprints for streaming endpoints."""
+        from ckanext.restricted_api.views import get_blueprints
+
+        return get_blueprints()
+
+    # IMiddleware
+    def make_middleware(self, app, config):
+        """Add conditional GET support and per-request audit summaries."""
+        from ckanext.restricted_api.audit import add_audit_handlers
+        from ckanext.restricted_api.middleware import add_etag_handlers
+
+        return add_audit_handlers(add_etag_handlers(app))
+
+    # IClick
+    def get_commands(self):
+        """CLI commands for the plugin."""
+        from ckanext.restricted_api.cli import get_commands
+
+        return get_commands()
+
     # IResourceController
     def before_resource_update(self, context, current, resource):
         """Hook before updating a resource."""
@@ -62,5 +100,8 @@ class RestrictedAPIPlugin(SingletonPlugin):
 
     def after_resource_update(self, context, resource):
         """Hook after updating a resource."""
+        # Mail and template machinery is only imported on the first notification
+        from ckanext.restricted_api.mailer import restricted_notify_access_granted
+
         previous_value = context.get("__restricted_previous_value")
         restricted_notify_access_granted(previous_value, resource)
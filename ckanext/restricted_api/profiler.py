@@ -0,0 +1,199 @@
+"""Opt-in cProfile sampling of the plugin's overridden actions.
+
+Profiles are written as .pstats files to a directory that is rotated to
+a maximum number of samples. Each has a .json sidecar with the action
+name, user, params and duration. As these contain user names and params,
+the directory and files are only readable by the CKAN process user.
+
+With search_workers > 0, package_search redacts results in pool threads,
+which cProfile does not see: their time shows up as waiting on futures.
+"""
+
+import cProfile
+import functools
+import json
+import marshal
+import os
+import random
+import re
+import stat
+import threading
+import time
+from logging import getLogger
+
+log = getLogger(__name__)
+
+_local = threading.local()
+
+
+def _open_private(path: str, mode: str):
+    """Open a file for writing, readable only by the current user."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    return os.fdopen(fd, mode)
+
+
+def _ensure_private_directory(directory: str):
+    """Create the profile directory, or check an existing one is private.
+
+    The mode of an existing directory is never changed.
+
+    Raises:
+        OSError: if the directory cannot be created.
+        ValueError: if it is not set, or is not a private directory owned
+            by the current user.
+    """
+    if not directory:
+        raise ValueError("set ckanext.restricted_api.profile_dir or ckan.storage_path")
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    try:
+        os.mkdir(directory, mode=0o700)
+    except FileExistsError:
+        pass
+
+    # lstat, so that a symlink to another directory is rejected
+    dir_stat = os.lstat(directory)
+    if not stat.S_ISDIR(dir_stat.st_mode):
+        raise ValueError(f"{directory} is not a directory")
+    if dir_stat.st_uid != os.getuid():
+        raise ValueError(f"{directory} is not owned by the CKAN process user")
+    if dir_stat.st_mode & 0o077:
+        raise ValueError(f"{directory} is accessible by other users, expected 0700")
+
+
+def _safe_name(value) -> str:
+    """Make a value safe for use in a file name."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(value or "anonymous"))[:64]
+
+
+class ActionProfiler:
+    """Profile sampled action calls and write them to a rotating directory."""
+
+    def __init__(
+        self, directory: str, sample_rate: float, min_duration_ms: int, max_files: int
+    ):
+        """Init profiler settings, creating the output directory.
+
+        Raises:
+            OSError, ValueError: if the directory cannot be created or is
+                not private.
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.min_duration_ms = min_duration_ms
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        _ensure_private_directory(directory)
+
+    def _should_profile(self) -> bool:
+        """Decide if a call is profiled.
+
+        With a latency threshold, every call is profiled and only slow calls
+        are kept, as the duration is not known up front.
+        """
+        if self.min_duration_ms > 0:
+            return True
+        return random.random() < self.sample_rate
+
+    def wrap(self, action_name, action):
+        """Wrap an action function so that sampled calls are profiled."""
+
+        @functools.wraps(action)
+        def _profiled_action(context, data_dict):
+            # Nested action calls run inside the outer profile
+            if getattr(_local, "active", False) or not self._should_profile():
+                return action(context, data_dict)
+
+            profile = cProfile.Profile()
+            _local.active = True
+            start = time.perf_counter()
+            try:
+                return profile.runcall(action, context, data_dict)
+            finally:
+                _local.active = False
+                duration_ms = (time.perf_counter() - start) * 1000
+                if duration_ms >= self.min_duration_ms:
+                    try:
+                        self._save(
+                            profile, action_name, context, data_dict, duration_ms
+                        )
+                    except Exception:
+                        log.exception(f"Failed to save profile for {action_name}")
+
+        return _profiled_action
+
+    def _save(self, profile, action_name, context, data_dict, duration_ms):
+        """Write the profile and metadata, then rotate old samples."""
+        user_name = context.get("user") if isinstance(context, dict) else None
+        now = time.time()
+        # Timestamp first, so that names sort oldest first for rotation
+        base_name = (
+            f"{time.strftime('%Y%m%dT%H%M%S', time.localtime(now))}"
+            f"-{int(now * 1000000) % 1000000:06d}"
+            f"-{_safe_name(action_name)}-{_safe_name(user_name)}"
+        )
+        base_path = os.path.join(self.directory, base_name)
+
+        # Same format as Profile.dump_stats, with private file permissions
+        profile.create_stats()
+        with _open_private(f"{base_path}.pstats", "wb") as pstats_file:
+            marshal.dump(profile.stats, pstats_file)
+        with _open_private(f"{base_path}.json", "w") as metadata_file:
+            json.dump(
+                {
+                    "action": action_name,
+                    "user": user_name,
+                    "params": data_dict,
+                    "duration_ms": round(duration_ms, 1),
+                },
+                metadata_file,
+                default=str,
+            )
+        log.debug(f"Saved profile for {action_name} ({duration_ms:.1f} ms)")
+        self._rotate()
+
+    def _rotate(self):
+        """Delete the oldest samples above max_files."""
+        with self._lock:
+            samples = sorted(list_profiles(self.directory))
+            for pstats_path in samples[: max(len(samples) - self.max_files, 0)]:
+                for path in (pstats_path, pstats_path[: -len(".pstats")] + ".json"):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+
+def list_profiles(directory: str, action_name: str = None) -> list:
+    """List the .pstats files in a directory, optionally for one action."""
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for file_name in os.listdir(directory):
+        if not file_name.endswith(".pstats"):
+            continue
+        if action_name and f"-{_safe_name(action_name)}-" not in file_name:
+            continue
+        profiles.append(os.path.join(directory, file_name))
+    return profiles
+
+
+def get_profiler(settings):
+    """Get a profiler from plugin settings.
+
+    Returns:
+        ActionProfiler: or None if profiling is off, or the profile
+            directory cannot be used.
+    """
+    if settings.profile_sample_rate <= 0 and settings.profile_min_duration_ms <= 0:
+        return None
+    try:
+        return ActionProfiler(
+            directory=settings.profile_dir,
+            sample_rate=settings.profile_sample_rate,
+            min_duration_ms=settings.profile_min_duration_ms,
+            max_files=settings.profile_max_files,
+        )
+    except (OSError, ValueError) as e:
+        log.error(f"Profiling disabled, invalid profile directory: {e}")
+        return None
@@ -0,0 +1,139 @@
+"""Plugin settings, parsed once from the CKAN config."""
+
+import os
+from dataclasses import dataclass
+from logging import getLogger
+
+from ckan.plugins import toolkit
+
+log = getLogger(__name__)
+
+_settings = None
+
+
+def _default_profile_dir(config) -> str:
+    """A profile directory under ckan.storage_path, if it is set."""
+    storage_path = config.get("ckan.storage_path")
+    if not storage_path:
+        return ""
+    return os.path.join(storage_path, "restricted_api_profiles")
+
+
+@dataclass(frozen=True)
+class RestrictedApiSettings:
+    """Typed, validated plugin settings."""
+
+    access_granted_template: str = "access_granted.txt"
+    access_request_template: str = "access_request.txt"
+    omit_resources_on_pkg_list: bool = True
+    search_workers: int = 0
+    search_chunk_size: int = 50
+    search_parallel_min_rows: int = 100
+    export_page_size: int = 100
+    search_report_timings: bool = False
+    enable_etags: bool = True
+    audit_enabled: bool = False
+    audit_file: str = ""
+    audit_sample_rate: float = 1.0
+    audit_buffer_size: int = 10000
+    audit_batch_size: int = 500
+    audit_flush_interval: float = 5.0
+    profile_sample_rate: float = 0.0
+    profile_min_duration_ms: int = 0
+    # Empty means restricted_api_profiles under ckan.storage_path
+    profile_dir: str = ""
+    profile_max_files: int = 200
+
+    @classmethod
+    def from_config(cls, config) -> "RestrictedApiSettings":
+        """Parse and validate settings from a CKAN config mapping.
+
+        Raises:
+            ValueError: if a setting has an invalid value.
+        """
+        defaults = cls()
+        prefix = "ckanext.restricted_api."
+
+        def _number(key, default, minimum, maximum=None, cast=int):
+            value = config.get(prefix + key, default)
+            try:
+                value = cast(value)
+            except (TypeError, ValueError):
+                raise ValueError(
+                    f"{prefix}{key} must be a {cast.__name__}, got: {value}"
+                ) from None
+            if value < minimum or (maximum is not None and value > maximum):
+                raise ValueError(
+                    f"{prefix}{key} must be between {minimum} and "
+                    f"{maximum if maximum is not None else 'inf'}, got: {value}"
+                )
+            return value
+
+        def _bool(key, default):
+            return toolkit.asbool(config.get(prefix + key, default))
+
+        return cls(
+            access_granted_template=config.get(
+                "restricted_api.access_granted_template",
+                defaults.access_granted_template,
+            ),
+            access_request_template=config.get(
+                "restricted_api.access_request_template",
+                defaults.access_request_template,
+            ),
+            omit_resources_on_pkg_list=_bool(
+                "omit_resources_on_pkg_list", defaults.omit_resources_on_pkg_list
+            ),
+            search_workers=_number("search_workers", defaults.search_workers, 0),
+            search_chunk_size=_number(
+                "search_chunk_size", defaults.search_chunk_size, 1
+            ),
+            search_parallel_min_rows=_number(
+                "search_parallel_min_rows", defaults.search_parallel_min_rows, 0
+            ),
+            export_page_size=_number(
+                "export_page_size", defaults.export_page_size, 1, 1000
+            ),
+            search_report_timings=_bool(
+                "search_report_timings", defaults.search_report_timings
+            ),
+            enable_etags=_bool("enable_etags", defaults.enable_etags),
+            audit_enabled=_bool("audit_enabled", defaults.audit_enabled),
+            audit_file=config.get(prefix + "audit_file", defaults.audit_file),
+            audit_sample_rate=_number(
+                "audit_sample_rate", defaults.audit_sample_rate, 0, 1, cast=float
+            ),
+            audit_buffer_size=_number(
+                "audit_buffer_size", defaults.audit_buffer_size, 1
+            ),
+            audit_batch_size=_number("audit_batch_size", defaults.audit_batch_size, 1),
+            audit_flush_interval=_number(
+                "audit_flush_interval", defaults.audit_flush_interval, 0.1, cast=float
+            ),
+            profile_sample_rate=_number(
+                "profile_sample_rate", defaults.profile_sample_rate, 0, 1, cast=float
+            ),
+            profile_min_duration_ms=_number(
+                "profile_min_duration_ms", defaults.profile_min_duration_ms, 0
+            ),
+            profile_dir=config.get(prefix + "profile_dir")
+            or _default_profile_dir(config),
+            profile_max_files=_number(
+                "profile_max_files", defaults.profile_max_files, 1
+            ),
+        )
+
+
+def load_settings(config) -> RestrictedApiSettings:
+    """Parse the plugin settings from config and store them."""
+    global _settings
+    _settings = RestrictedApiSettings.from_config(config)
+    log.debug(f"Loaded restricted_api settings: {_settings}")
+    return _settings
+
+
+def get_settings() -> RestrictedApiSettings:
+    """Get the plugin settings, loading them from config on first use."""
+    if _settings is None:
+        return load_settings(toolkit.config)
+    return _settings
@@ -0,0 +1,11 @@
+"""Fixtures for ckanext-restricted_api tests."""
+
+import pytest
+
+from ckanext.restricted_api.settings import load_settings
+
+
+@pytest.fixture
+def restricted_settings(ckan_config):
+    """Reload the plugin settings after ckan_config marks are applied."""
+    return load_settings(ckan_config)
@@ -0,0 +1,137 @@
+"""Tests for audit.py."""
+
+import json
+from dataclasses import replace
+
+import pytest
+from ckan.tests import factories
+
+from ckanext.restricted_api import audit
+from ckanext.restricted_api.settings import RestrictedApiSettings
+
+
+def _read_records(path):
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def _recorder(audit_file, monkeypatch, **kwargs):
+    """Build a recorder without its flush thread, so tests flush explicitly."""
+    options = dict(buffer_size=100, batch_size=100, flush_interval=60, sample_rate=1)
+    options.update(kwargs)
+    recorder = audit.AuditRecorder(audit_file=str(audit_file), **options)
+    monkeypatch.setattr(recorder, "_ensure_thread", lambda: None)
+    return recorder
+
+
+def _deny(recorder, resource_id):
+    recorder.record_denial(
+        "user", {"id": resource_id}, {"id": "package"}, "registered", "denied"
+    )
+
+
+@pytest.fixture
+def disable_audit():
+    """Stop any recorder created by the test."""
+    yield
+    audit.configure_audit(RestrictedApiSettings())
+
+
+def test_ring_buffer_overflow_records_dropped(tmp_path, monkeypatch):
+    """When the buffer is full the oldest records are dropped and counted."""
+    audit_file = tmp_path / "audit.jsonl"
+    recorder = _recorder(audit_file, monkeypatch, buffer_size=2)
+
+    for resource_id in range(5):
+        _deny(recorder, resource_id)
+    recorder.flush()
+
+    records = _read_records(audit_file)
+    assert [r["resource_id"] for r in records[:2]] == [3, 4]
+    assert records[2] == {"event": "audit_dropped", "count": 3}
+
+
+@pytest.mark.parametrize("sample_rate,expected", [(0, 0), (1, 10)])
+def test_sample_rate(tmp_path, monkeypatch, sample_rate, expected):
+    """Only sampled denials are recorded."""
+    audit_file = tmp_path / "audit.jsonl"
+    recorder = _recorder(audit_file, monkeypatch, sample_rate=sample_rate)
+
+    for resource_id in range(10):
+        _deny(recorder, resource_id)
+    recorder.flush()
+
+    assert len(_read_records(audit_file)) == expected
+
+
+def test_one_write_per_batch(tmp_path, monkeypatch):
+    """Each batch is written to the audit file in a single write."""
+    audit_file = tmp_path / "audit.jsonl"
+    recorder = _recorder(audit_file, monkeypatch, batch_size=3)
+    payloads = []
+    write = recorder._write
+    monkeypatch.setattr(
+        recorder, "_write", lambda payload: payloads.append(payload) or write(payload)
+    )
+
+    for resource_id in range(7):
+        _deny(recorder, resource_id)
+    recorder.flush()
+
+    assert [len(payload.splitlines()) for payload in payloads] == [3, 3, 1]
+    assert len(_read_records(audit_file)) == 7
+
+
+@pytest.mark.usefixtures("disable_audit")
+def test_configure_audit_stops_previous_recorder(tmp_path):
+    """Reconfiguring stops the previous recorder's thread and flushes it."""
+    audit_file = tmp_path / "audit.jsonl"
+    settings = replace(
+        RestrictedApiSettings(),
+        audit_enabled=True,
+        audit_file=str(audit_file),
+        audit_flush_interval=0.1,
+    )
+    audit.configure_audit(settings)
+    previous = audit.recorder
+    _deny(previous, "resource")
+
+    audit.configure_audit(settings)
+
+    assert audit.recorder is not previous
+    assert not previous._thread.is_alive()
+    assert len(_read_records(audit_file)) == 1
+
+    audit.configure_audit(RestrictedApiSettings())
+    assert audit.recorder is None
+
+
+@pytest.mark.usefixtures("clean_db", "with_plugins", "disable_audit")
+def test_request_summary(make_app, ckan_config, tmp_path, monkeypatch):
+    """Denials in a request are summarised once per user."""
+    audit_file = tmp_path / "audit.jsonl"
+    monkeypatch.setitem(ckan_config, "ckanext.restricted_api.audit_enabled", "true")
+    monkeypatch.setitem(
+        ckan_config, "ckanext.restricted_api.audit_file", str(audit_file)
+    )
+    app = make_app()
+    restricted = json.dumps({"level": "registered", "allowed_users": ""})
+    dataset = factories.Dataset(
+        resources=[
+            {"url": "http://example.com/a.csv", "restricted": restricted},
+            {"url": "http://example.com/b.csv", "restricted": restricted},
+        ]
+    )
+
+    response = app.get(f"/api/3/action/package_show?id={dataset['id']}")
+    assert response.status_code == 200
+    audit.recorder.stop()
+
+    summaries = [
+        r for r in _read_records(audit_file) if r["event"] == "request_summary"
+    ]
+    assert len(summaries) == 1
+    assert summaries[0]["user"] == ""
+    assert summaries[0]["denied"] == 2
+    assert summaries[0]["by_level"] == {"registered": 2}
@@ -0,0 +1,37 @@
+"""Tests for cli.py."""
+
+from click.testing import CliRunner
+
+from ckanext.restricted_api.cli import profile_summary
+from ckanext.restricted_api.profiler import ActionProfiler
+
+
+def _search(context, data_dict):
+    return sorted(range(1000), key=str)
+
+
+def test_profile_summary(tmp_path):
+    """The summary lists the slowest samples and the top functions."""
+    directory = tmp_path / "profiles"
+    profiler = ActionProfiler(str(directory), 1.0, 0, 10)
+    profiler.wrap("package_search", _search)({"user": "user"}, {"q": "test"})
+    profiler.wrap("package_show", _search)({"user": "user"}, {"id": "test"})
+
+    result = CliRunner().invoke(
+        profile_summary,
+        ["--dir", str(directory), "--action", "package_search", "--top", "5"],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert f"1 samples from {directory}" in result.output
+    assert "package_search  user=user  params={'q': 'test'}" in result.output
+    assert "package_show" not in result.output
+    assert "_search" in result.output
+
+
+def test_profile_summary_no_profiles(tmp_path):
+    """An empty directory is reported, not an error."""
+    result = CliRunner().invoke(profile_summary, ["--dir", str(tmp_path)])
+
+    assert result.exit_code == 0
+    assert "No profiles found" in result.output
@@ -0,0 +1,18 @@
+"""Tests for executor.py."""
+
+from ckanext.restricted_api.executor import _get_executor
+
+
+def test_executor_is_reused_for_same_size():
+    """The pool is shared while search_workers is unchanged."""
+    assert _get_executor(2) is _get_executor(2)
+
+
+def test_executor_is_rebuilt_when_size_changes():
+    """A changed search_workers, e.g. after a config reload, resizes the pool."""
+    executor = _get_executor(2)
+    resized = _get_executor(3)
+
+    assert resized is not executor
+    assert resized._max_workers == 3
+    assert _get_executor(3) is resized
@@ -0,0 +1,91 @@
+"""Tests for logic.py."""
+
+import json
+
+import pytest
+from ckan import model
+from ckan.logic.action.get import package_search
+from ckan.tests import factories, helpers
+
+from ckanext.restricted_api.logic import restricted_package_show
+
+RESTRICTED_LEVELS = (
+    "public",
+    "registered",
+    "only_allowed_users",
+    "any_organization",
+    "same_organization",
+)
+
+
+def _restricted_resource(level):
+    return {
+        "url": f"http://example.com/{level}.csv",
+        "restricted": json.dumps({"level": level, "allowed_users": ""}),
+    }
+
+
+@pytest.mark.ckan_config("ckanext.restricted_api.search_workers", "2")
+@pytest.mark.ckan_config("ckanext.restricted_api.search_chunk_size", "2")
+@pytest.mark.ckan_config("ckanext.restricted_api.search_parallel_min_rows", "1")
+@pytest.mark.usefixtures(
+    "clean_db", "clean_index", "with_plugins", "with_request_context"
+)
+def test_parallel_package_search_matches_serial(restricted_settings):
+    """Parallel redaction returns the same ordered results as serial."""
+    assert restricted_settings.search_workers == 2
+
+    user = factories.User()
+    org = factories.Organization(users=[{"name": user["name"], "capacity": "member"}])
+    other_org = factories.Organization()
+    for i, level in enumerate(RESTRICTED_LEVELS * 2):
+        factories.Dataset(
+            owner_org=org["id"] if i % 2 else other_org["id"],
+            resources=[_restricted_resource(level)],
+        )
+
+    search_params = {"rows": 100, "sort": "name asc"}
+    result = helpers.call_action(
+        "package_search", context={"user": user["name"]}, **search_params
+    )
+
+    core_ids = [
+        package["id"]
+        for package in package_search(
+            {"model": model, "session": model.Session, "user": user["name"]},
+            dict(search_params),
+        )["results"]
+    ]
+    serial = [
+        restricted_package_show(
+            {"model": model, "session": model.Session, "user": user["name"]},
+            {"id": package_id},
+        )
+        for package_id in core_ids
+    ]
+
+    assert [package["id"] for package in result["results"]] == core_ids
+    assert result["results"] == serial
+    assert any(
+        resource["url"] == "redacted"
+        for package in result["results"]
+        for resource in package["resources"]
+    )
+
+
+@pytest.mark.ckan_config("ckanext.restricted_api.search_workers", "2")
+@pytest.mark.ckan_config("ckanext.restricted_api.search_chunk_size", "2")
+@pytest.mark.ckan_config("ckanext.restricted_api.search_parallel_min_rows", "1")
+@pytest.mark.ckan_config("ckanext.restricted_api.search_report_timings", "true")
+@pytest.mark.usefixtures(
+    "clean_db", "clean_index", "with_plugins", "with_request_context"
+)
+def test_parallel_package_search_reports_chunk_timings(restricted_settings):
+    """Chunk latencies are added to the result when enabled."""
+    for level in RESTRICTED_LEVELS:
+        factories.Dataset(resources=[_restricted_resource(level)])
+
+    result = helpers.call_action("package_search", rows=100)
+
+    # 5 packages in chunks of 2
+    assert len(result["restricted_chunk_timings_ms"]) == 3
@@ -0,0 +1,135 @@
+"""Tests for middleware.py (conditional GET with ETags)."""
+
+import pytest
+from ckan.tests import factories, helpers
+
+
+def _package_show_url(package_id, **params):
+    query = "".join(f"&{key}={value}" for key, value in params.items())
+    return f"/api/3/action/package_show?id={package_id}{query}"
+
+
+def _get_etag(app, url, headers=None):
+    response = app.get(url, headers=headers or {})
+    assert response.status_code == 200
+    assert response.headers.get("ETag")
+    return response.headers["ETag"]
+
+
+@pytest.mark.usefixtures("clean_db", "with_plugins")
+def test_if_none_match_returns_304(app):
+    """A matching If-None-Match on package_show returns 304."""
+    dataset = factories.Dataset()
+    url = _package_show_url(dataset["id"])
+
+    etag = _get_etag(app, url)
+    response = app.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.usefixtures("clean_db", "with_plugins")
+def test_check_access_if_none_match_returns_304(app):
+    """A matching If-None-Match on restricted_check_access returns 304."""
+    dataset = factories.Dataset(resources=[{"url": "http://example.com/a.csv"}])
+    url = (
+        "/api/3/action/restricted_check_access"
+        f"?package_id={dataset['id']}"
+        f"&resource_id={dataset['resources'][0]['id']}"
+    )
+
+    etag = _get_etag(app, url)
+    response = app.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+
+
+@pytest.mark.usefixtures("clean_db", "with_plugins")
+def test_resource_update_changes_etag(app):
+    """Updating a resource changes the package ETag."""
+    dataset = factories.Dataset(resources=[{"url": "http://example.com/a.csv"}])
+    url = _package_show_url(dataset["id"])
+
+    etag = _get_etag(app, url)
+    helpers.call_action(
+        "resource_patch", id=dataset["resources"][0]["id"], description="updated"
+    )
+
+    assert _get_etag(app, url) != etag
+    response = app.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("clean_db", "with_plugins")
+def test_org_membership_change_changes_etag(app):
+    """Joining an organisation changes the user's ETag."""
+    user = factories.User()
+    token = factories.APIToken(user=user["name"])["token"]
+    org = factories.Organization()
+    dataset = factories.Dataset()
+    url = _package_show_url(dataset["id"])
+    headers = {"Authorization": token}
+
+    etag = _get_etag(app, url, headers)
+    helpers.call_action(
+        "organization_member_create",
+        id=org["id"],
+        username=user["name"],
+        role="member",
+    )
+
+    assert _get_etag(app, url, headers) != etag
+
+
+@pytest.mark.usefixtures("clean_db", "with_plugins")
+def test_query_params_change_etag(app):
+    """Different query params give different ETags."""
+    dataset = factories.Dataset()
+
+    etag = _get_etag(app, _package_show_url(dataset["id"]))
+    default_schema_etag = _get_etag(
+        app, _package_show_url(dataset["id"], use_default_schema="true")
+    )
+    name_etag = _get_etag(app, _package_show_url(dataset["name"]))
+
+    assert len({etag, default_schema_etag, name_etag}) == 3
+
+
+@pytest.mark.ckan_config("ckan.auth.allow_dataset_collaborators", "true")
+@pytest.mark.usefixtures("clean_db", "with_plugins")
+def test_collaborator_change_changes_etag(app):
+    """Adding the user as a dataset collaborator changes the ETag."""
+    user = factories.User()
+    token = factories.APIToken(user=user["name"])["token"]
+    dataset = factories.Dataset(owner_org=factories.Organization()["id"])
+    url = _package_show_url(dataset["id"])
+    headers = {"Authorization": token}
+
+    etag = _get_etag(app, url, headers)
+    helpers.call_action(
+        "package_collaborator_create",
+        id=dataset["id"],
+        user_id=user["id"],
+        capacity="editor",
+    )
+
+    assert _get_etag(app, url, headers) != etag
+
+
+@pytest.mark.usefixtures("clean_db", "with_plugins")
+def test_check_access_resource_from_other_package_has_no_etag(app):
+    """No ETag is given when the resource is not in the requested package."""
+    dataset = factories.Dataset()
+    other_dataset = factories.Dataset(
+        resources=[{"url": "http://example.com/a.csv"}]
+    )
+    url = (
+        "/api/3/action/restricted_check_access"
+        f"?package_id={dataset['id']}"
+        f"&resource_id={other_dataset['resources'][0]['id']}"
+    )
+
+    response = app.get(url)
+
+    assert "ETag" not in response.headers
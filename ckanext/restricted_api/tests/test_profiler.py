@@ -0,0 +1,119 @@
+"""Tests for profiler.py."""
+
+import os
+import time
+from dataclasses import replace
+
+import pytest
+
+from ckanext.restricted_api.profiler import ActionProfiler, get_profiler, list_profiles
+from ckanext.restricted_api.settings import RestrictedApiSettings
+
+
+def _action(context, data_dict):
+    return data_dict
+
+
+def _slow_action(context, data_dict):
+    time.sleep(0.05)
+    return data_dict
+
+
+def _profiler(directory, sample_rate=1.0, min_duration_ms=0, max_files=10):
+    return ActionProfiler(str(directory), sample_rate, min_duration_ms, max_files)
+
+
+@pytest.mark.parametrize("sample_rate,expected", [(0, 0), (1, 3)])
+def test_sample_rate(tmp_path, sample_rate, expected):
+    """Only sampled calls are profiled."""
+    directory = tmp_path / "profiles"
+    action = _profiler(directory, sample_rate=sample_rate).wrap("test", _action)
+
+    for i in range(3):
+        assert action({"user": "user"}, {"id": i}) == {"id": i}
+
+    assert len(list_profiles(str(directory))) == expected
+
+
+def test_min_duration_keeps_slow_calls(tmp_path):
+    """With a threshold only calls slower than it are saved."""
+    directory = tmp_path / "profiles"
+    profiler = _profiler(directory, sample_rate=0, min_duration_ms=20)
+
+    profiler.wrap("fast", _action)({}, {})
+    profiler.wrap("slow", _slow_action)({}, {})
+
+    assert list_profiles(str(directory), "fast") == []
+    assert len(list_profiles(str(directory), "slow")) == 1
+
+
+def test_nested_calls_are_not_profiled_separately(tmp_path):
+    """Actions called by a profiled action run inside the outer profile."""
+    directory = tmp_path / "profiles"
+    profiler = _profiler(directory)
+    inner = profiler.wrap("inner", _action)
+    outer = profiler.wrap("outer", lambda context, data_dict: inner(context, data_dict))
+
+    outer({}, {})
+
+    assert len(list_profiles(str(directory), "outer")) == 1
+    assert list_profiles(str(directory), "inner") == []
+
+
+def test_rotate_deletes_oldest(tmp_path):
+    """Rotation keeps the newest max_files samples and their metadata."""
+    directory = tmp_path / "profiles"
+    profiler = _profiler(directory, max_files=2)
+    for i in range(4):
+        for extension in ("pstats", "json"):
+            (directory / f"20240101T00000{i}-000000-test-user.{extension}").touch()
+
+    profiler._rotate()
+
+    assert sorted(os.listdir(directory)) == [
+        "20240101T000002-000000-test-user.json",
+        "20240101T000002-000000-test-user.pstats",
+        "20240101T000003-000000-test-user.json",
+        "20240101T000003-000000-test-user.pstats",
+    ]
+
+
+def test_creates_private_directory(tmp_path):
+    """A new profile directory is only accessible by the current user."""
+    directory = tmp_path / "profiles"
+    _profiler(directory).wrap("test", _action)({}, {})
+
+    assert directory.stat().st_mode & 0o777 == 0o700
+    for path in directory.iterdir():
+        assert path.stat().st_mode & 0o777 == 0o600
+
+
+def _profile_settings(directory):
+    return replace(
+        RestrictedApiSettings(), profile_sample_rate=1.0, profile_dir=str(directory)
+    )
+
+
+def test_shared_directory_disables_profiling(tmp_path):
+    """An existing directory accessible by others is rejected, not changed."""
+    directory = tmp_path / "profiles"
+    directory.mkdir(mode=0o755)
+    directory.chmod(0o755)
+
+    assert get_profiler(_profile_settings(directory)) is None
+    assert directory.stat().st_mode & 0o777 == 0o755
+
+
+def test_symlinked_directory_disables_profiling(tmp_path):
+    """A symlink in place of the profile directory is rejected."""
+    target = tmp_path / "target"
+    target.mkdir(mode=0o700)
+    directory = tmp_path / "profiles"
+    directory.symlink_to(target)
+
+    assert get_profiler(_profile_settings(directory)) is None
+
+
+def test_no_directory_disables_profiling():
+    """Without profile_dir or ckan.storage_path profiling is disabled."""
+    assert get_profiler(_profile_settings("")) is None
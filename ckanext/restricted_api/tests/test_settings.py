@@ -0,0 +1,77 @@
+"""Tests for settings.py."""
+
+import pytest
+
+from ckanext.restricted_api.settings import RestrictedApiSettings
+
+PREFIX = "ckanext.restricted_api."
+
+
+def test_defaults():
+    """An empty config gives the default settings."""
+    settings = RestrictedApiSettings.from_config({})
+
+    assert settings == RestrictedApiSettings()
+    assert settings.omit_resources_on_pkg_list is True
+    assert settings.search_workers == 0
+    assert settings.access_granted_template == "access_granted.txt"
+
+
+def test_valid_override():
+    """Config strings are cast to the typed settings."""
+    settings = RestrictedApiSettings.from_config(
+        {
+            PREFIX + "search_workers": "4",
+            PREFIX + "audit_sample_rate": "0.25",
+            PREFIX + "enable_etags": "no",
+            "restricted_api.access_request_template": "custom.txt",
+        }
+    )
+
+    assert settings.search_workers == 4
+    assert settings.audit_sample_rate == 0.25
+    assert settings.enable_etags is False
+    assert settings.access_request_template == "custom.txt"
+
+
+def test_omit_resources_false_string():
+    """The string "false" disables omit_resources_on_pkg_list."""
+    settings = RestrictedApiSettings.from_config(
+        {PREFIX + "omit_resources_on_pkg_list": "false"}
+    )
+
+    assert settings.omit_resources_on_pkg_list is False
+
+
+@pytest.mark.parametrize(
+    "key,value",
+    [
+        ("search_chunk_size", "0"),
+        ("export_page_size", "1001"),
+        ("audit_sample_rate", "1.5"),
+    ],
+)
+def test_out_of_range_value(key, value):
+    """Values outside the allowed bounds are rejected."""
+    with pytest.raises(ValueError, match=PREFIX + key):
+        RestrictedApiSettings.from_config({PREFIX + key: value})
+
+
+@pytest.mark.parametrize(
+    "key,value",
+    [
+        ("search_workers", "many"),
+        ("audit_flush_interval", "soon"),
+    ],
+)
+def test_non_numeric_value(key, value):
+    """Values that cannot be cast to a number are rejected."""
+    with pytest.raises(ValueError, match="must be a"):
+        RestrictedApiSettings.from_config({PREFIX + key: value})
+
+
+def test_profile_dir_defaults_to_storage_path():
+    """Without profile_dir, profiles go under ckan.storage_path."""
+    settings = RestrictedApiSettings.from_config({"ckan.storage_path": "/var/ckan"})
+
+    assert settings.profile_dir == "/var/ckan/restricted_api_profiles"
@@ -0,0 +1,75 @@
+"""Tests for views.py."""
+
+import json
+
+import pytest
+from ckan.tests import factories
+
+EXPORT_URL = "/api/restricted/export.ndjson"
+
+
+def _export(app, **params):
+    response = app.get(EXPORT_URL, query_string=params)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+@pytest.mark.ckan_config("ckanext.restricted_api.export_page_size", "2")
+@pytest.mark.usefixtures("clean_db", "clean_index", "with_plugins")
+def test_export_disjunctive_fq_with_cursor(app, restricted_settings):
+    """A disjunctive fq with a cursor returns only matching later ids."""
+    matching_ids = sorted(
+        [factories.Dataset(tags=[{"name": "a"}])["id"] for _ in range(3)]
+        + [factories.Dataset(tags=[{"name": "b"}])["id"] for _ in range(3)]
+    )
+    for _ in range(3):
+        factories.Dataset(tags=[{"name": "c"}])
+
+    cursor = matching_ids[1]
+    packages = _export(app, fq="tags:a OR tags:b", cursor=cursor)
+
+    assert [package["id"] for package in packages] == matching_ids[2:]
+
+
+@pytest.mark.ckan_config("ckanext.restricted_api.export_page_size", "2")
+@pytest.mark.usefixtures("clean_db", "clean_index", "with_plugins")
+def test_export_redacts_resources(app, restricted_settings):
+    """Restricted resource urls are redacted in the export."""
+    factories.Dataset(
+        resources=[
+            {
+                "url": "http://example.com/data.csv",
+                "restricted": json.dumps(
+                    {"level": "registered", "allowed_users": ""}
+                ),
+            }
+        ]
+    )
+
+    packages = _export(app)
+
+    assert packages[0]["resources"][0]["url"] == "redacted"
+
+
+@pytest.mark.ckan_config("ckanext.restricted_api.export_page_size", "5")
+@pytest.mark.ckan_config("ckan.search.rows_max", "2")
+@pytest.mark.usefixtures("clean_db", "clean_index", "with_plugins")
+def test_export_page_size_above_rows_max(app, restricted_settings):
+    """The export pages through all packages when rows_max is lower."""
+    dataset_ids = sorted(factories.Dataset()["id"] for _ in range(5))
+
+    packages = _export(app)
+
+    assert [package["id"] for package in packages] == dataset_ids
+
+
+@pytest.mark.usefixtures("clean_db", "clean_index", "with_plugins")
+def test_export_malformed_fq_returns_400(app):
+    """An invalid fq is reported as a 400 JSON error before streaming."""
+    factories.Dataset()
+
+    response = app.get(EXPORT_URL, query_string={"fq": "tags:(a OR"})
+
+    assert response.status_code == 400
+    assert response.mimetype == "application/json"
+    assert response.get_json()["success"] is False
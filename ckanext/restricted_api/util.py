@@ -1,12 +1,14 @@
 """Helper functions for the plugin."""
 
 
+import hashlib
 import json
+import logging
 import re
 from logging import getLogger
 
 import ckan.logic as logic
-from ckan.model import User
+from ckan.model import PackageMember, Session, User
 from ckan.plugins import toolkit
 
 log = getLogger(__name__)
@@ -53,8 +55,8 @@ def is_valid_ip(ip_str):
 def get_user_id_from_context(context, username: bool = False):
     """Get user id or username from context."""
     if (user := context.get("user", "")) != "":
-        if is_valid_ip(user):
-            log.debug(f"Unauthenticated access attempted from IP: {user}")
+        if log.isEnabledFor(logging.DEBUG) and is_valid_ip(user):
+            log.debug("Unauthenticated access attempted from IP: %s", user)
         log.debug("User ID extracted from context user key")
         user_id = user
     elif user := context.get("auth_user_obj", None):
@@ -72,14 +74,14 @@ def get_user_id_from_context(context, username: bool = False):
         return None
 
     try:
-        log.info(f"Getting user details with user_id: {user_id}")
+        log.debug("Getting user details with user_id: %s", user_id)
         user = toolkit.get_action("user_show")(
             data_dict={
                 "id": user_id,
             },
         )
     except Exception:
-        log.warning(f"Could not find a user for ID: {user_id}")
+        log.debug("Could not find a user for ID: %s", user_id)
 
     return user_id
 
@@ -109,6 +111,41 @@ def get_user_organisations(user_name) -> dict:
     return user_organization_dict
 
 
+def get_user_access_fingerprint(user_name, package_id: str = None) -> str:
+    """Get a hash of the user properties that affect resource access.
+
+    Covers the user, sysadmin status, organisation memberships (including
+    capacity) and, if package_id is given, the user's collaborator capacity
+    on that package, so it changes whenever a decision could.
+    """
+    if not user_name:
+        return hashlib.sha1(b"anonymous").hexdigest()
+
+    user = User.get(user_name)
+    is_sysadmin = bool(user and user.sysadmin)
+
+    context = {"user": user_name}
+    data_dict = {"permission": "read"}
+    memberships = sorted(
+        f"{org.get('id', '')}={org.get('capacity', '')}"
+        for org in logic.get_action("organization_list_for_user")(context, data_dict)
+    )
+
+    collaborator_capacity = ""
+    if user and package_id:
+        collaborator = (
+            Session.query(PackageMember.capacity)
+            .filter_by(package_id=package_id, user_id=user.id)
+            .first()
+        )
+        collaborator_capacity = collaborator.capacity if collaborator else ""
+
+    fingerprint = (
+        f"{user_name}|{is_sysadmin}|{','.join(memberships)}|{collaborator_capacity}"
+    )
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+
+
 def get_restricted_dict(resource_dict):
     """Get the resource restriction info.
 
@@ -0,0 +1,135 @@
+"""Blueprint views for the plugin."""
+
+import json
+from logging import getLogger
+
+from ckan import model
+from ckan.lib.search import SearchError
+from ckan.logic.action.get import package_search
+from ckan.plugins import toolkit
+from flask import Blueprint, Response, request, stream_with_context
+
+from ckanext.restricted_api.logic import redact_package_dict
+from ckanext.restricted_api.settings import get_settings
+
+log = getLogger(__name__)
+
+restricted_api = Blueprint("restricted_api", __name__)
+
+
+def _get_context():
+    """Build an action context for the current user."""
+    return {
+        "model": model,
+        "session": model.Session,
+        "user": toolkit.current_user.name,
+        "auth_user_obj": toolkit.current_user,
+    }
+
+
+def _keyset_filter(cursor: str) -> list:
+    """Get the filter list for package ids strictly after the cursor.
+
+    Passed as a separate filter query (fq_list), so it is applied on its own
+    rather than combined with the user's fq through Solr operator precedence.
+    """
+    if not cursor:
+        return []
+    escaped_cursor = cursor.replace("\\", "\\\\").replace('"', '\\"')
+    return [f'id:{{"{escaped_cursor}" TO *]']
+
+
+def _search_page(context, search_params: dict, cursor: str) -> list:
+    """Get one page of packages after the cursor, in id order."""
+    search_result = package_search(
+        dict(context),
+        dict(search_params, fq_list=_keyset_filter(cursor), sort="id asc"),
+    )
+    return search_result.get("results", [])
+
+
+def iter_redacted_packages(context, search_params: dict, cursor: str, first_page):
+    """Yield redacted package dicts in id order, one search page at a time.
+
+    Only a single page is held in memory at once. The id of the last
+    package yielded can be passed back as the cursor to resume.
+    """
+    packages = first_page
+    # Stop on an empty page, not a short one: core package_search caps
+    # rows at ckan.search.rows_max, which may be below the page size
+    while packages:
+        for package in packages:
+            yield redact_package_dict(dict(context), package)
+
+        if cursor and packages[-1]["id"] <= cursor:
+            # Never re-request a page that did not move past the cursor
+            log.warning(f"Export cursor did not advance past {cursor}, stopping")
+            return
+        cursor = packages[-1]["id"]
+        packages = _search_page(context, search_params, cursor)
+
+
+def _error_response(status: int, error_type: str, message):
+    """Build a JSON error response in the style of the CKAN action API."""
+    return Response(
+        json.dumps(
+            {"success": False, "error": {"__type": error_type, "message": message}}
+        ),
+        status=status,
+        mimetype="application/json",
+    )
+
+
+def export_packages():
+    """Stream the catalog as newline-delimited JSON, with redacted resources.
+
+    Query params:
+        q: Solr query, default all packages.
+        fq: Solr filter query.
+        cursor: resume after the package with this id.
+        include_private: include private packages the user can read.
+    """
+    context = _get_context()
+    cursor = request.args.get("cursor", "")
+    search_params = {
+        "q": request.args.get("q", "*:*"),
+        "fq": request.args.get("fq", ""),
+        "rows": get_settings().export_page_size,
+        "include_private": toolkit.asbool(
+            request.args.get("include_private", False)
+        ),
+    }
+
+    log.debug(f"Streaming NDJSON export, params={search_params} cursor={cursor}")
+
+    # The first page is fetched before the response starts, so an invalid
+    # query is reported as a 400 rather than a truncated 200 stream
+    try:
+        first_page = _search_page(context, search_params, cursor)
+    except toolkit.ValidationError as e:
+        return _error_response(400, "Validation Error", e.error_dict)
+    except SearchError as e:
+        return _error_response(400, "Search Error", str(e))
+
+    def _generate():
+        for package in iter_redacted_packages(
+            context, search_params, cursor, first_page
+        ):
+            yield json.dumps(package) + "\n"
+
+    return Response(
+        stream_with_context(_generate()),
+        mimetype="application/x-ndjson",
+    )
+
+
+restricted_api.add_url_rule(
+    "/api/restricted/export.ndjson",
+    view_func=export_packages,
+    methods=["GET"],
+)
+
+
+def get_blueprints():
+    """Blueprints to register with CKAN."""
+    return [restricted_api]